@@ -12,20 +12,24 @@ Telegram Bot: Facebook Account XLSX Generator
 
 from __future__ import annotations
 
-import io
+import asyncio
 import json
 import logging
 import os
 import re
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from enum import IntEnum
+from functools import lru_cache
+from itertools import chain, islice
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, Iterable, List, Tuple
 
 from dotenv import load_dotenv
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from telegram import (
     InputFile,
     KeyboardButton,
@@ -36,17 +40,26 @@ from telegram import (
     Update,
 )
 from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, RetryAfter
 from telegram.ext import (
     Application,
+    BaseUpdateProcessor,
     CommandHandler,
     ContextTypes,
     ConversationHandler,
     CallbackQueryHandler,
+    Defaults,
     MessageHandler,
     filters,
 )
 
+try:
+    import orjson  # opsional: (de)serialisasi store lebih cepat
+except ImportError:
+    orjson = None
+
 import inventori
+import xlsxutil
 
 # -----------------------------------------------------------------------------
 # Environment & Logging
@@ -87,19 +100,44 @@ ADMIN_MENU_EXTRA = "🧩 Admin Tambahan"
 EFFECT_FIRE = "5104841245755180586"
 EFFECT_TADA = "5046509860389126442"
 
-UID_REGEX = re.compile(r"^[0-9]{8,20}$")
-PASSWORD_REGEX = re.compile(r"^[^\s]{6,64}$")
-FILENAME_REGEX = re.compile(r"^[A-Za-z0-9_-]{1,50}$")
+# Setara ^[A-Za-z0-9_-]{1,50}$, dicek dengan set karakter (lihat is_valid_filename)
+FILENAME_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
 
-# Delimiter split: comma, whitespace (space/tab/newline), including multiple
-SPLIT_REGEX = re.compile(r"[,\s]+")
+# Delimiter: comma, whitespace (space/tab/newline), including multiple.
+# Koma diubah jadi spasi lalu str.split() tanpa argumen (tidak pernah menghasilkan token kosong)
+COMMA_TO_SPACE = str.maketrans(",", " ")
 
-# Strict cookie key=value; validator (semicolon optional at end)
-COOKIE_FORMAT_REGEX = re.compile(
-    r"^\s*[A-Za-z0-9_]+=[^;=\n\r]+(?:;\s*[A-Za-z0-9_]+=[^;=\n\r]+)*;?\s*$"
-)
+# Strict cookie key=value; validator (semicolon optional at end).
+# Divalidasi per segmen secara linear (lihat validate_cookie), bukan satu
+# regex bersarang yang rawan backtracking pada input panjang.
+COOKIE_KEY_REGEX = re.compile(r"[A-Za-z0-9_]+")
+# Batas entri per input; pesan Telegram sendiri sudah dibatasi 4096 karakter
+MAX_INPUT_TOKENS = 500
+
+# Sintaks perintah admin (dipakai dengan fullmatch)
+WHITELIST_CMD_REGEX = re.compile(r"(allow|deny)\s+(\d+)", re.IGNORECASE)
+DURATION_CMD_REGEX = re.compile(r"(\d+)\s+(\d+)")
+BLOCK_CMD_REGEX = re.compile(r"(block|unblock)\s+(\d+)", re.IGNORECASE)
+
+# Batas global Telegram ~30 pesan/detik; broadcast dijaga sedikit di bawahnya
+BROADCAST_RATE_PER_SEC = 25
+# Jumlah request broadcast yang boleh berjalan bersamaan (menutupi latency jaringan)
+BROADCAST_CONCURRENCY = 20
+
+# Batas update yang dijalankan bersamaan (antar chat); di dalam satu chat tetap berurutan
+UPDATE_CONCURRENCY = 256
+# Batas update yang boleh diterima sekaligus, termasuk yang masih menunggu giliran di chat-nya.
+# Dibuat longgar agar satu chat yang sibuk (forward massal, broadcast admin) tidak menahan chat lain
+UPDATE_BACKLOG_LIMIT = 10_000
 
 DATA_STORE_FILE = Path("bot_data.json")
+# Jeda (detik) sebelum perubahan store di-flush ke disk; beberapa update digabung jadi satu tulis
+STORE_FLUSH_DELAY = 1.0
+
+# Ukuran thread pool khusus build XLSX (disimpan di bot_data["xlsx_pool"])
+XLSX_MAX_WORKERS = os.cpu_count() or 4
+# Auto-filter & freeze panes hanya dipasang jika jumlah baris data >= nilai ini
+XLSX_FILTER_MIN_ROWS = 5
 
 
 class States(IntEnum):
@@ -119,7 +157,7 @@ class AdminStates(IntEnum):
     BROADCAST_INPUT = 105
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedInput:
     uids: List[str]
     passwords: List[str]
@@ -130,16 +168,16 @@ class ParsedInput:
 # Config / Admin helpers
 # -----------------------------------------------------------------------------
 
-def parse_admin_ids() -> set[int]:
+def parse_admin_ids() -> frozenset[int]:
     raw = os.getenv("ADMIN_IDS", "").strip()
     ids: set[int] = set()
     if not raw:
-        return ids
+        return frozenset(ids)
     for x in raw.split(","):
         x = x.strip()
         if x.isdigit():
             ids.add(int(x))
-    return ids
+    return frozenset(ids)
 
 
 ADMIN_IDS = parse_admin_ids()
@@ -149,6 +187,8 @@ def utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+# Dipanggil di setiap cek akses dengan string expiry yang sama per user; datetime immutable jadi aman di-cache
+@lru_cache(maxsize=4096)
 def parse_utc_iso(value: str | None) -> datetime | None:
     if not value:
         return None
@@ -162,6 +202,19 @@ def to_utc_iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+def dumps_store(store: dict) -> bytes:
+    # set (store["blocked"]) ditulis sebagai list terurut; key int (store["users"]) jadi string
+    if orjson is not None:
+        return orjson.dumps(store, default=sorted, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(store, ensure_ascii=False, separators=(",", ":"), default=sorted).encode("utf-8")
+
+
+def loads_store(raw: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def load_store() -> dict:
     if not DATA_STORE_FILE.exists():
         return {
@@ -174,7 +227,7 @@ def load_store() -> dict:
             },
         }
     try:
-        return json.loads(DATA_STORE_FILE.read_text(encoding="utf-8"))
+        return loads_store(DATA_STORE_FILE.read_bytes())
     except Exception:
         logger.exception("Failed to load store; fallback to default")
         return {
@@ -188,34 +241,95 @@ def load_store() -> dict:
         }
 
 
-def save_store(store: dict) -> None:
-    DATA_STORE_FILE.write_text(
-        json.dumps(store, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+# Store dimuat sekali lalu dipakai langsung dari memori; disk hanya ditulis oleh flusher
+_STORE: dict | None = None
+# Update dari chat berbeda berjalan paralel (ChatUpdateProcessor), jadi ubah -> tandai dirty harus berurutan
+_STORE_LOCK = asyncio.Lock()
+_STORE_DIRTY = asyncio.Event()
+# Menjaga dua penulisan file (mis. flusher yang dibatalkan + flush saat shutdown) tidak tumpang tindih
+_STORE_WRITE_LOCK = threading.Lock()
+
+
+def get_store() -> dict:
+    global _STORE
+    if _STORE is None:
+        _STORE = load_store()
+        # Di memori sebagai set agar cek blokir per pesan O(1); ditulis ke JSON sebagai list
+        _STORE["blocked"] = set(_STORE.get("blocked", []))
+        # Chat yang tidak bisa dikirimi lagi (bot diblokir / chat hilang); dilewati saat broadcast
+        _STORE["dead_chats"] = set(_STORE.get("dead_chats", []))
+        # Key user di JSON berupa string; di memori int agar tidak perlu str(user_id) per pesan
+        _STORE["users"] = {int(k): v for k, v in _STORE.get("users", {}).items() if k.isdigit()}
+        # Lengkapi counter yang hilang (file lama) agar handler bisa mengindeks langsung
+        stats = _STORE.setdefault("stats", {})
+        stats.setdefault("total_docs_created", 0)
+        stats.setdefault("total_messages_processed", 0)
+        stats.setdefault("last_broadcast_at", None)
+    return _STORE
+
+
+@asynccontextmanager
+async def store_transaction() -> AsyncIterator[dict]:
+    """Serahkan store in-memory untuk diubah, lalu jadwalkan flush ke disk."""
+    async with _STORE_LOCK:
+        yield get_store()
+        _STORE_DIRTY.set()
+
+
+def write_store_file(payload: bytes) -> None:
+    """Tulis store secara atomik: file sementara lalu os.replace."""
+    tmp = DATA_STORE_FILE.with_name(DATA_STORE_FILE.name + ".tmp")
+    with _STORE_WRITE_LOCK:
+        with open(tmp, "wb") as fh:
+            fh.write(payload)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, DATA_STORE_FILE)
+
+
+async def flush_store() -> None:
+    if _STORE is None or not _STORE_DIRTY.is_set():
+        return
+    _STORE_DIRTY.clear()
+    # Serialisasi di event loop (snapshot konsisten), tulis file di thread
+    payload = dumps_store(_STORE)
+    try:
+        await asyncio.to_thread(write_store_file, payload)
+    except Exception:
+        # Gagal tulis: tandai dirty lagi agar dicoba pada flush berikutnya
+        _STORE_DIRTY.set()
+        raise
+
+
+async def store_flusher() -> None:
+    while True:
+        await _STORE_DIRTY.wait()
+        await asyncio.sleep(STORE_FLUSH_DELAY)
+        try:
+            await flush_store()
+        except Exception:
+            logger.exception("Failed to flush store")
 
 
 def ensure_user_record(store: dict, user_id: int) -> dict:
-    users: Dict[str, dict] = store.setdefault("users", {})
-    key = str(user_id)
-    if key not in users:
-        users[key] = {
+    users: Dict[int, dict] = store["users"]
+    u = users.get(user_id)
+    if u is None:
+        u = users[user_id] = {
             "whitelisted": False,
             "access_expires_at": None,
             "created_docs": 0,
             "last_seen_at": to_utc_iso(utc_now()),
         }
-    return users[key]
+    return u
 
 
 def user_is_admin(user_id: int | None) -> bool:
-    return bool(user_id and user_id in ADMIN_IDS)
+    return user_id in ADMIN_IDS
 
 
 def user_is_blocked(store: dict, user_id: int | None) -> bool:
-    if not user_id:
-        return False
-    return user_id in set(store.get("blocked", []))
+    return user_id in store["blocked"]
 
 
 def user_has_access(store: dict, user_id: int | None) -> bool:
@@ -241,13 +355,14 @@ def touch_user(store: dict, user_id: int | None) -> None:
         return
     u = ensure_user_record(store, user_id)
     u["last_seen_at"] = to_utc_iso(utc_now())
+    store["dead_chats"].discard(user_id)
 
 
 # -----------------------------------------------------------------------------
 # UI / Keyboard Builders
 # -----------------------------------------------------------------------------
 
-def main_menu_keyboard(is_admin: bool = False) -> ReplyKeyboardMarkup:
+def _build_main_menu_keyboard(is_admin: bool) -> ReplyKeyboardMarkup:
     rows = [
         [KeyboardButton(MAIN_MENU_INVENTORY)],  # Dipindahkan ke paling atas
         [KeyboardButton(MAIN_MENU_CREATE_DOC)],
@@ -263,73 +378,144 @@ def main_menu_keyboard(is_admin: bool = False) -> ReplyKeyboardMarkup:
     )
 
 
+# Markup PTB bersifat immutable, jadi aman dipakai bersama antar user/pesan
+_MAIN_MENU_KB_USER = _build_main_menu_keyboard(is_admin=False)
+_MAIN_MENU_KB_ADMIN = _build_main_menu_keyboard(is_admin=True)
+
+_CREATE_DOC_SUBMENU_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(SUBMENU_MANUAL), KeyboardButton(SUBMENU_INSTANT)],
+        [KeyboardButton(SUBMENU_BACK)],
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=False,
+)
+
+_ADMIN_MENU_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(ADMIN_MENU_WHITELIST), KeyboardButton(ADMIN_MENU_DURATION)],
+        [KeyboardButton(ADMIN_MENU_BLOCK), KeyboardButton(ADMIN_MENU_BROADCAST)],
+        [KeyboardButton(ADMIN_MENU_STATS), KeyboardButton(ADMIN_MENU_EXTRA)],
+        [KeyboardButton(SUBMENU_BACK)],
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=False,
+)
+
+_INLINE_CANCEL_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❌ Batal & Kembali", callback_data="cancel_input")]
+])
+
+_REMOVE_KB = ReplyKeyboardRemove()
+
+
+def main_menu_keyboard(is_admin: bool = False) -> ReplyKeyboardMarkup:
+    return _MAIN_MENU_KB_ADMIN if is_admin else _MAIN_MENU_KB_USER
+
+
 def create_doc_submenu_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(SUBMENU_MANUAL), KeyboardButton(SUBMENU_INSTANT)],
-            [KeyboardButton(SUBMENU_BACK)],
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=False,
-    )
+    return _CREATE_DOC_SUBMENU_KB
 
 
 def inline_cancel_keyboard() -> InlineKeyboardMarkup:
     """Mengembalikan keyboard inline untuk membatalkan proses yang sedang berjalan."""
-    return InlineKeyboardMarkup([
-        [InlineKeyboardButton("❌ Batal & Kembali", callback_data="cancel_input")]
-    ])
+    return _INLINE_CANCEL_KB
 
 
 def admin_menu_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(ADMIN_MENU_WHITELIST), KeyboardButton(ADMIN_MENU_DURATION)],
-            [KeyboardButton(ADMIN_MENU_BLOCK), KeyboardButton(ADMIN_MENU_BROADCAST)],
-            [KeyboardButton(ADMIN_MENU_STATS), KeyboardButton(ADMIN_MENU_EXTRA)],
-            [KeyboardButton(SUBMENU_BACK)],
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=False,
-    )
+    return _ADMIN_MENU_KB
 
 
 # -----------------------------------------------------------------------------
 # Parsing & Validation Utilities
 # -----------------------------------------------------------------------------
 
-def split_tokens(text: str) -> List[str]:
-    return [part.strip() for part in SPLIT_REGEX.split(text.strip()) if part.strip()]
+def is_valid_uid(uid: str) -> bool:
+    # Setara ^[0-9]{8,20}$; isascii() menolak digit non-ASCII yang lolos isdigit()
+    return 8 <= len(uid) <= 20 and uid.isascii() and uid.isdigit()
 
 
-def has_delimiter(raw: str) -> bool:
-    return bool(re.search(r"[,\s]", raw))
+def is_valid_password(pwd: str) -> bool:
+    # Setara ^[^\s]{6,64}$; split() hanya mengembalikan [pwd] jika tanpa whitespace
+    return 6 <= len(pwd) <= 64 and pwd.split() == [pwd]
 
 
-def validate_uids(uids: Sequence[str]) -> Tuple[bool, str]:
-    if not uids:
-        return False, "❌ <b>Oops! UID kosong.</b>\nSilakan masukkan minimal 1 UID."
-    for i, uid in enumerate(uids, start=1):
-        if not UID_REGEX.fullmatch(uid):
-            return (
-                False,
-                f"❌ <b>UID ke-{i} tidak valid:</b> <code>{uid}</code>\n"
-                "📌 <i>Syarat: Hanya digit, panjang 8–20 karakter.</i>",
-            )
-    return True, ""
+# Template pesan error; diisi dengan str.format saat validasi gagal
+_ERR_UID_TMPL = (
+    "❌ <b>UID ke-{i} tidak valid:</b> <code>{uid}</code>\n"
+    "📌 <i>Syarat: Hanya digit, panjang 8–20 karakter.</i>"
+)
+_ERR_PASSWORD_TMPL = (
+    "❌ <b>Password ke-{i} tidak valid.</b>\n"
+    "📌 <i>Syarat: 6–64 karakter dan tidak boleh mengandung spasi.</i>"
+)
+_ERR_COOKIE_TMPL = "❌ <b>Cookie ke-{i} tidak valid.</b>\n💡 <i>Alasan: {reason}</i>"
+_ERR_UID_EMPTY = "❌ <b>Oops! UID kosong.</b>\nSilakan masukkan minimal 1 UID."
+_ERR_PASSWORD_EMPTY = "❌ <b>Oops! Password kosong.</b>\nSilakan masukkan minimal 1 password."
+_ERR_COOKIE_EMPTY = "❌ <b>Oops! Cookie kosong.</b>\nSilakan masukkan minimal 1 cookie."
+_ERR_TOO_MANY_TMPL = "❌ <b>Data terlalu banyak.</b>\nMaksimal {max} entri per input."
+_ERR_MISMATCH_TMPL = (
+    "❌ <b>Jumlah data tidak seimbang!</b>\n\n"
+    "📊 UID: {uids}\n🔑 PASSWORD: {passwords}\n🍪 COOKIE: {cookies}"
+)
 
 
-def validate_passwords(passwords: Sequence[str]) -> Tuple[bool, str]:
-    if not passwords:
-        return False, "❌ <b>Oops! Password kosong.</b>\nSilakan masukkan minimal 1 password."
-    for i, pwd in enumerate(passwords, start=1):
-        if not PASSWORD_REGEX.fullmatch(pwd):
-            return (
-                False,
-                f"❌ <b>Password ke-{i} tidak valid.</b>\n"
-                "📌 <i>Syarat: 6–64 karakter dan tidak boleh mengandung spasi.</i>",
-            )
-    return True, ""
+def _tokenize(raw: str, empty_error: str) -> Tuple[bool, str, List[str]]:
+    tokens = raw.translate(COMMA_TO_SPACE).split()
+    if not tokens:
+        return False, empty_error, []
+    if len(tokens) > MAX_INPUT_TOKENS:
+        return False, _ERR_TOO_MANY_TMPL.format(max=MAX_INPUT_TOKENS), []
+    return True, "", tokens
+
+
+def _parse_tokens(
+    raw: str, token_error: Callable[[int, str], str], empty_error: str
+) -> Tuple[bool, str, List[str]]:
+    """Tokenisasi lalu validasi per token; berhenti di token invalid pertama."""
+    ok, err, tokens = _tokenize(raw, empty_error)
+    if not ok:
+        return False, err, []
+    for i, token in enumerate(tokens, start=1):
+        err = token_error(i, token)
+        if err:
+            return False, err, []
+    return True, "", tokens
+
+
+def _uid_error(i: int, uid: str) -> str:
+    if is_valid_uid(uid):
+        return ""
+    return _ERR_UID_TMPL.format(i=i, uid=uid)
+
+
+def _password_error(i: int, pwd: str) -> str:
+    if is_valid_password(pwd):
+        return ""
+    return _ERR_PASSWORD_TMPL.format(i=i)
+
+
+def parse_uids(raw: str) -> Tuple[bool, str, List[str]]:
+    return _parse_tokens(raw, _uid_error, _ERR_UID_EMPTY)
+
+
+def parse_passwords(raw: str) -> Tuple[bool, str, List[str]]:
+    return _parse_tokens(raw, _password_error, _ERR_PASSWORD_EMPTY)
+
+
+def is_cookie_format(c: str) -> bool:
+    """Cek format key=value;key=value; dalam satu lintasan linear (tanpa backtracking)."""
+    if c.endswith(";"):
+        c = c[:-1]
+    for i, part in enumerate(c.split(";")):
+        if i:
+            part = part.lstrip()
+        key, sep, value = part.partition("=")
+        if not sep or not value or not COOKIE_KEY_REGEX.fullmatch(key):
+            return False
+        if "=" in value or "\n" in value or "\r" in value:
+            return False
+    return True
 
 
 def validate_cookie(cookie: str) -> Tuple[bool, str]:
@@ -340,23 +526,29 @@ def validate_cookie(cookie: str) -> Tuple[bool, str]:
         return False, "Cookie minimal 20 karakter."
     if "c_user=" not in c or "xs=" not in c:
         return False, "Cookie wajib mengandung <code>c_user=</code> dan <code>xs=</code>."
-    if not COOKIE_FORMAT_REGEX.fullmatch(c):
+    if not is_cookie_format(c):
         return False, "Format harus <code>key=value;key=value;</code>."
     return True, ""
 
 
-def validate_cookies(cookies: Sequence[str]) -> Tuple[bool, str]:
-    if not cookies:
-        return False, "❌ <b>Oops! Cookie kosong.</b>\nSilakan masukkan minimal 1 cookie."
-    for i, ck in enumerate(cookies, start=1):
-        ok, reason = validate_cookie(ck)
-        if not ok:
-            return False, f"❌ <b>Cookie ke-{i} tidak valid.</b>\n💡 <i>Alasan: {reason}</i>"
-    return True, ""
+def _cookie_error(i: int, cookie: str) -> str:
+    ok, reason = validate_cookie(cookie)
+    if ok:
+        return ""
+    return _ERR_COOKIE_TMPL.format(i=i, reason=reason)
+
+
+def parse_cookies(raw: str) -> Tuple[bool, str, List[str]]:
+    return _parse_tokens(raw, _cookie_error, _ERR_COOKIE_EMPTY)
 
 
 def parse_instant_message(text: str) -> Tuple[bool, str, ParsedInput | None]:
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    lines: List[str] = []
+    for ln in text.splitlines():
+        if ln and not ln.isspace():
+            lines.append(ln)
+            if len(lines) == 3:
+                break
     if len(lines) < 3:
         return (
             False,
@@ -365,40 +557,45 @@ def parse_instant_message(text: str) -> Tuple[bool, str, ParsedInput | None]:
             None,
         )
 
-    uid_line, pwd_line, cookie_line = lines[0], lines[1], lines[2]
+    uid_line, pwd_line, cookie_line = lines
 
-    uids = split_tokens(uid_line)
-    passwords = split_tokens(pwd_line)
-    cookies = split_tokens(cookie_line)
-
-    ok, err = validate_uids(uids)
+    ok, err, uids = _tokenize(uid_line, _ERR_UID_EMPTY)
     if not ok:
         return False, err, None
 
-    ok, err = validate_passwords(passwords)
+    ok, err, passwords = _tokenize(pwd_line, _ERR_PASSWORD_EMPTY)
     if not ok:
         return False, err, None
 
-    ok, err = validate_cookies(cookies)
+    ok, err, cookies = _tokenize(cookie_line, _ERR_COOKIE_EMPTY)
     if not ok:
         return False, err, None
 
+    # Jumlah dicek dulu (murah), lalu validasi tiap baris (uid, password, cookie) dalam satu lintasan
     if not (len(uids) == len(passwords) == len(cookies)):
         return (
             False,
-            "❌ <b>Jumlah data tidak seimbang!</b>\n\n"
-            f"📊 UID: {len(uids)}\n🔑 PASSWORD: {len(passwords)}\n🍪 COOKIE: {len(cookies)}",
+            _ERR_MISMATCH_TMPL.format(uids=len(uids), passwords=len(passwords), cookies=len(cookies)),
             None,
         )
 
+    for i, (uid, pwd, cookie) in enumerate(zip(uids, passwords, cookies), start=1):
+        err = _uid_error(i, uid) or _password_error(i, pwd) or _cookie_error(i, cookie)
+        if err:
+            return False, err, None
+
     return True, "", ParsedInput(uids=uids, passwords=passwords, cookies=cookies)
 
 
+def is_valid_filename(name: str) -> bool:
+    return 1 <= len(name) <= 50 and FILENAME_CHARS.issuperset(name)
+
+
 def validate_filename_no_ext(raw: str) -> Tuple[bool, str]:
     s = raw.strip()
     if not s:
         return True, ""  # empty allowed => default timestamp name
-    if not FILENAME_REGEX.fullmatch(s):
+    if not is_valid_filename(s):
         return (
             False,
             "❌ <b>Nama file tidak valid.</b>\n\n"
@@ -419,50 +616,26 @@ def build_filename(raw: str) -> str:
 # XLSX Generator
 # -----------------------------------------------------------------------------
 
-def build_xlsx_file(data: ParsedInput) -> io.BytesIO:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "DATA"
-
-    headers = ["UID", "PASSWORD", "COOKIE"]
-    ws.append(headers)
-
-    for uid, pwd, cookie in zip(data.uids, data.passwords, data.cookies):
-        ws.append([uid, pwd, cookie])
-
-    header_font = Font(name="Calibri", size=13, bold=True, color="FFFFFF")
-    data_font = Font(name="Calibri", size=11)
-    header_fill = PatternFill(fill_type="solid", fgColor="1F4E78")
-    medium_side = Side(style="medium", color="000000")
-    all_border = Border(left=medium_side, right=medium_side, top=medium_side, bottom=medium_side)
-
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.border = all_border
-
-    max_row = ws.max_row
-    for r in range(2, max_row + 1):
-        for c in range(1, 4):
-            cell = ws.cell(row=r, column=c)
-            cell.font = data_font
-            cell.border = all_border
-            cell.alignment = Alignment(
-                horizontal="left",
-                vertical="center",
-                wrap_text=(c == 3),
-            )
-
-    ws.column_dimensions["A"].width = 22
-    ws.column_dimensions["B"].width = 25
-    ws.column_dimensions["C"].width = 80
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = f"A1:C{max_row}"
-    ws.row_dimensions[1].height = 24
-
-    output = io.BytesIO()
-    wb.save(output)
+def build_xlsx_file(rows: Iterable[Tuple[str, str, str]]) -> BinaryIO:
+    wb, ws = xlsxutil.new_workbook("DATA")
+    # Intip beberapa baris pertama untuk menentukan filter tanpa mematerialisasi semua baris
+    rows = iter(rows)
+    head = list(islice(rows, XLSX_FILTER_MIN_ROWS))
+    use_filter = len(head) >= XLSX_FILTER_MIN_ROWS
+    if use_filter:
+        ws.freeze_panes = "A2"
+
+    xlsxutil.append_header(ws)
+    max_row = 1
+    for values in chain(head, rows):
+        xlsxutil.append_data_row(ws, values)
+        max_row += 1
+
+    if use_filter:
+        ws.auto_filter.ref = f"A1:C{max_row}"
+
+    output = xlsxutil.new_output()
+    xlsxutil.save_workbook(wb, output)
     output.seek(0)
     return output
 
@@ -499,6 +672,25 @@ def hard_reset_user_session(context: ContextTypes.DEFAULT_TYPE) -> None:
     context.user_data.clear()
 
 
+SESSION_EXPIRED_TEXT = (
+    "⚠️ <b>Sesi input sudah berakhir atau direset.</b>\n"
+    "Silakan mulai ulang dari menu 📝 Buat Dokumen Excel."
+)
+
+
+def session_input(context: ContextTypes.DEFAULT_TYPE) -> ParsedInput:
+    """Data sesi aktif (manual/instan) disimpan sebagai satu ParsedInput di user_data."""
+    # Hanya untuk langkah pengumpulan input; langkah akhir memakai user_data.get("parsed")
+    parsed = context.user_data.get("parsed")
+    if parsed is None:
+        parsed = context.user_data["parsed"] = ParsedInput(uids=[], passwords=[], cookies=[])
+    return parsed
+
+
+def message_text(update: Update) -> str:
+    return update.effective_message.text or ""
+
+
 def current_user_id(update: Update) -> int | None:
     return update.effective_user.id if update.effective_user else None
 
@@ -513,26 +705,26 @@ async def force_back_to_main_menu(update: Update, context: ContextTypes.DEFAULT_
     is_admin = user_is_admin(uid)
     await update.effective_message.reply_text(
         text,
-        parse_mode=ParseMode.HTML,
         reply_markup=main_menu_keyboard(is_admin=is_admin),
     )
     return ConversationHandler.END
 
 
+BLOCKED_TEXT = "⛔ <b>Akses Anda sedang diblokir.</b>\nHubungi administrator bot jika ini sebuah kesalahan."
+
+
 async def guard_access(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
-    store = load_store()
     uid = current_user_id(update)
     if uid is None:
         return False
 
-    touch_user(store, uid)
-    store["stats"]["total_messages_processed"] = store["stats"].get("total_messages_processed", 0) + 1
-    save_store(store)
+    async with store_transaction() as store:
+        touch_user(store, uid)
+        store["stats"]["total_messages_processed"] += 1
 
     if user_is_blocked(store, uid):
         await update.effective_message.reply_text(
-            "⛔ <b>Akses Anda sedang diblokir.</b>\nHubungi administrator bot jika ini sebuah kesalahan.",
-            parse_mode=ParseMode.HTML,
+            BLOCKED_TEXT,
             reply_markup=main_menu_keyboard(is_admin=user_is_admin(uid)),
         )
         return False
@@ -540,7 +732,6 @@ async def guard_access(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bo
     if not user_has_access(store, uid):
         await update.effective_message.reply_text(
             "🔒 <b>Akses Terbatas</b>\nAkun Anda belum masuk dalam daftar putih (Whitelist).\nSilakan hubungi administrator untuk meminta akses.",
-            parse_mode=ParseMode.HTML,
             reply_markup=main_menu_keyboard(is_admin=user_is_admin(uid)),
         )
         return False
@@ -553,8 +744,7 @@ async def clear_keyboard_ui(update: Update) -> None:
     try:
         tmp_msg = await update.effective_message.reply_text(
             "🔄 <i>Menyiapkan UI...</i>",
-            parse_mode=ParseMode.HTML,
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=_REMOVE_KB
         )
         await tmp_msg.delete()
     except Exception as e:
@@ -568,37 +758,46 @@ async def clear_keyboard_ui(update: Update) -> None:
 async def send_xlsx_result(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
-    data: ParsedInput,
+    rows: Iterable[Tuple[str, str, str]],
     filename: str,
+    closing_text: str,
 ) -> None:
+    """Kirim file XLSX sekaligus pesan penutup sesi & Main Menu dalam satu API call."""
+    uid = current_user_id(update)
+    is_admin = user_is_admin(uid)
     try:
-        xlsx_buffer = build_xlsx_file(data)
-
-        # Pisahkan notifikasi text agar message effect (TADA 🎉) berjalan optimal
-        await update.effective_chat.send_message(
-            text="✨ <b>Dokumen berhasil digenerasi dengan sempurna!</b>\nSilakan unduh file Excel Anda di bawah ini. ✅",
-            parse_mode=ParseMode.HTML,
-            message_effect_id=EFFECT_TADA
+        # Render di thread pool XLSX agar event loop tetap melayani chat lain
+        loop = asyncio.get_running_loop()
+        xlsx_buffer = await loop.run_in_executor(
+            context.application.bot_data["xlsx_pool"], build_xlsx_file, rows
         )
 
-        await update.effective_chat.send_document(
-            document=InputFile(xlsx_buffer, filename=filename),
-        )
+        with xlsx_buffer:
+            await update.effective_chat.send_document(
+                document=InputFile(
+                    xlsxutil.upload_content(xlsx_buffer), filename=filename, read_file_handle=False
+                ),
+                caption=(
+                    "✨ <b>Dokumen berhasil digenerasi dengan sempurna!</b>\n"
+                    "Silakan unduh file Excel Anda di atas. ✅\n\n"
+                    f"{closing_text}"
+                ),
+                reply_markup=main_menu_keyboard(is_admin=is_admin),
+                message_effect_id=EFFECT_TADA,
+            )
 
-        store = load_store()
-        uid = current_user_id(update)
-        if uid:
-            u = ensure_user_record(store, uid)
-            u["created_docs"] = int(u.get("created_docs", 0)) + 1
-        store["stats"]["total_docs_created"] = store["stats"].get("total_docs_created", 0) + 1
-        save_store(store)
+        async with store_transaction() as store:
+            if uid:
+                u = ensure_user_record(store, uid)
+                u["created_docs"] = int(u.get("created_docs", 0)) + 1
+            store["stats"]["total_docs_created"] += 1
 
     except Exception:
         logger.exception("Failed to generate/send XLSX")
         await update.effective_message.reply_text(
-            "❌ <b>Terjadi kesalahan sistem internal</b> saat merender file XLSX. Mohon coba lagi.",
-            parse_mode=ParseMode.HTML,
-            reply_markup=inline_cancel_keyboard(),
+            "❌ <b>Terjadi kesalahan sistem internal</b> saat merender file XLSX. Mohon coba lagi.\n\n"
+            f"{closing_text}",
+            reply_markup=main_menu_keyboard(is_admin=is_admin),
         )
 
 
@@ -609,12 +808,15 @@ async def send_xlsx_result(
 async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     hard_reset_user_session(context)
     uid = current_user_id(update)
+    # /start dikirim saat user membuka blokir bot; chat kembali bisa menerima broadcast
+    if uid in get_store()["dead_chats"]:
+        async with store_transaction() as store:
+            store["dead_chats"].discard(uid)
     is_admin = user_is_admin(uid)
     await update.effective_message.reply_text(
         "✨ <b>Selamat Datang di FBDocBot!</b>\n\n"
         "Asisten pintar Anda untuk menyusun dan mengelola dokumen Excel secara otomatis.\n\n"
         "👉 <i>Silakan pilih opsi dari menu di bawah untuk memulai.</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=main_menu_keyboard(is_admin=is_admin),
         message_effect_id=EFFECT_FIRE
     )
@@ -625,7 +827,6 @@ async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     uid = current_user_id(update)
     await update.effective_message.reply_text(
         HELP_TEXT,
-        parse_mode=ParseMode.HTML,
         reply_markup=main_menu_keyboard(is_admin=user_is_admin(uid)),
     )
     return ConversationHandler.END
@@ -648,7 +849,6 @@ async def cancel_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Edit pesan yang tadinya memiliki tombol Inline agar rapi
     await query.edit_message_text(
         "❎ <i>Anda membatalkan input data pada sesi ini. Proses dihentikan.</i>",
-        parse_mode=ParseMode.HTML
     )
 
     uid = current_user_id(update)
@@ -657,7 +857,6 @@ async def cancel_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await context.bot.send_message(
         chat_id=query.message.chat_id,
         text="🔙 <b>Kembali ke Menu Utama.</b>",
-        parse_mode=ParseMode.HTML,
         reply_markup=main_menu_keyboard(is_admin=is_admin)
     )
     return ConversationHandler.END
@@ -671,7 +870,6 @@ async def menu_create_doc_handler(update: Update, context: ContextTypes.DEFAULT_
     await update.effective_message.reply_text(
         "🛠️ <b>Mode Pembuatan Dokumen</b>\n\n"
         "Pilih metode penyusunan data yang paling sesuai dengan kebutuhan Anda:",
-        parse_mode=ParseMode.HTML,
         reply_markup=create_doc_submenu_keyboard(),
     )
     return ConversationHandler.END
@@ -692,123 +890,103 @@ async def manual_start_handler(update: Update, context: ContextTypes.DEFAULT_TYP
         "⌨️ <b>Input Manual [Langkah 1 / 4]</b>\n\n"
         "👉 <b>Masukkan daftar UID</b>\n"
         "<i>(Pisahkan antar data menggunakan spasi, koma, atau baris baru)</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=inline_cancel_keyboard(),
     )
     return States.ASK_UID
 
 
 async def ask_uid_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.effective_message.text or "").strip()
+    raw = message_text(update)
     if is_control_reset_text(raw):
         return await cancel_handler(update, context)
 
-    if not has_delimiter(raw) and len(raw.split()) > 1:
-        await update.effective_message.reply_text(
-            "❌ <b>Format UID ditolak.</b> Harap pastikan setiap UID dipisahkan oleh spasi atau koma.",
-            parse_mode=ParseMode.HTML,
-            reply_markup=inline_cancel_keyboard(),
-        )
-        return States.ASK_UID
-
-    uids = split_tokens(raw)
-    ok, err = validate_uids(uids)
+    ok, err, uids = parse_uids(raw)
     if not ok:
         await update.effective_message.reply_text(
             err,
-            parse_mode=ParseMode.HTML,
             reply_markup=inline_cancel_keyboard(),
         )
         return States.ASK_UID
 
-    context.user_data["uids"] = uids
+    session_input(context).uids = uids
     await update.effective_message.reply_text(
         f"✅ <b>UID Valid!</b> Terdeteksi <b>{len(uids)}</b> entri data.\n\n"
         "🔐 <b>Input Manual [Langkah 2 / 4]</b>\n"
         "👉 <b>Masukkan daftar PASSWORD</b> dengan pemisah (spasi/koma/enter).",
-        parse_mode=ParseMode.HTML,
         reply_markup=inline_cancel_keyboard(),
     )
     return States.ASK_PASSWORD
 
 
 async def ask_password_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.effective_message.text or "").strip()
+    raw = message_text(update)
     if is_control_reset_text(raw):
         return await cancel_handler(update, context)
 
-    passwords = split_tokens(raw)
-    ok, err = validate_passwords(passwords)
+    ok, err, passwords = parse_passwords(raw)
     if not ok:
         await update.effective_message.reply_text(
             err,
-            parse_mode=ParseMode.HTML,
             reply_markup=inline_cancel_keyboard(),
         )
         return States.ASK_PASSWORD
 
-    uids = context.user_data.get("uids", [])
+    parsed = session_input(context)
+    uids = parsed.uids
     if len(passwords) != len(uids):
         await update.effective_message.reply_text(
             f"❌ <b>Kuantitas Data Tidak Sinkron</b>\n"
             f"Total UID: <b>{len(uids)}</b>\n"
             f"Total PASSWORD: <b>{len(passwords)}</b>\n\n"
             "Harap perbaiki input Password Anda agar jumlahnya cocok.",
-            parse_mode=ParseMode.HTML,
             reply_markup=inline_cancel_keyboard(),
         )
         return States.ASK_PASSWORD
 
-    context.user_data["passwords"] = passwords
+    parsed.passwords = passwords
     await update.effective_message.reply_text(
         "✅ <b>Password Valid!</b>\n\n"
         "🍪 <b>Input Manual [Langkah 3 / 4]</b>\n"
         "👉 <b>Masukkan daftar COOKIE</b> dengan format yang tepat.",
-        parse_mode=ParseMode.HTML,
         reply_markup=inline_cancel_keyboard(),
     )
     return States.ASK_COOKIE
 
 
 async def ask_cookie_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.effective_message.text or "").strip()
+    raw = message_text(update)
     if is_control_reset_text(raw):
         return await cancel_handler(update, context)
 
-    cookies = split_tokens(raw)
-    ok, err = validate_cookies(cookies)
+    ok, err, cookies = parse_cookies(raw)
     if not ok:
         await update.effective_message.reply_text(
             err,
-            parse_mode=ParseMode.HTML,
             reply_markup=inline_cancel_keyboard(),
         )
         return States.ASK_COOKIE
 
-    uids = context.user_data.get("uids", [])
-    passwords = context.user_data.get("passwords", [])
+    parsed = session_input(context)
+    uids, passwords = parsed.uids, parsed.passwords
     if not (len(uids) == len(passwords) == len(cookies)):
         await update.effective_message.reply_text(
-            "❌ <b>Kuantitas Data Tidak Seimbang</b>\n"
-            "Jumlah UID, Password, dan Cookie harus presisi sama.",
-            parse_mode=ParseMode.HTML,
+            _ERR_MISMATCH_TMPL.format(uids=len(uids), passwords=len(passwords), cookies=len(cookies)),
             reply_markup=inline_cancel_keyboard(),
         )
         return States.ASK_COOKIE
 
-    context.user_data["cookies"] = cookies
+    parsed.cookies = cookies
     await update.effective_message.reply_text(
         "📝 <b>Input Manual [Langkah 4 / 4]</b>\n\n"
         "👉 <b>Tentukan Nama File Excel</b> (tanpa .xlsx)\n"
         "<i>* Anda dapat mengosongkan/mengirim karakter apapun jika ingin sistem menggunakan penamaan waktu otomatis.</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=inline_cancel_keyboard(),
     )
     return States.ASK_FILENAME_MANUAL
 
 
 async def ask_filename_manual_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.effective_message.text or "").strip()
+    raw = message_text(update).strip()
     if is_control_reset_text(raw):
         return await cancel_handler(update, context)
 
@@ -816,31 +994,26 @@ async def ask_filename_manual_handler(update: Update, context: ContextTypes.DEFA
     if not ok:
         await update.effective_message.reply_text(
             err,
-            parse_mode=ParseMode.HTML,
             reply_markup=inline_cancel_keyboard(),
         )
         return States.ASK_FILENAME_MANUAL
 
-    filename = build_filename(raw)
-    parsed = ParsedInput(
-        uids=context.user_data.get("uids", []),
-        passwords=context.user_data.get("passwords", []),
-        cookies=context.user_data.get("cookies", []),
-    )
+    parsed = context.user_data.get("parsed")
+    if parsed is None:
+        return await force_back_to_main_menu(update, context, SESSION_EXPIRED_TEXT)
 
-    progress_msg = await update.effective_message.reply_text(
-        "⏳ <i>Memproses data yang terkumpul dan merender file Excel...</i>",
-        parse_mode=ParseMode.HTML,
-    )
-    
-    await send_xlsx_result(update, context, parsed, filename)
-    await progress_msg.delete()
+    filename = build_filename(raw)
+    rows = zip(parsed.uids, parsed.passwords, parsed.cookies, strict=True)
 
-    return await force_back_to_main_menu(
+    await send_xlsx_result(
         update,
         context,
+        rows,
+        filename,
         "🔙 Sesi Manual selesai. Anda telah kembali ke antarmuka utama.",
     )
+    hard_reset_user_session(context)
+    return ConversationHandler.END
 
 
 # -----------------------------------------------------------------------------
@@ -861,14 +1034,13 @@ async def instant_start_handler(update: Update, context: ContextTypes.DEFAULT_TY
         "<code>Baris 2</code>: Seluruh PASSWORD\n"
         "<code>Baris 3</code>: Seluruh COOKIE\n\n"
         "👉 <i>Silakan masukkan payload instan Anda sekarang.</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=inline_cancel_keyboard(),
     )
     return States.ASK_INSTANT_PAYLOAD
 
 
 async def ask_instant_payload_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = (update.effective_message.text or "").strip()
+    text = message_text(update)
     if is_control_reset_text(text):
         return await cancel_handler(update, context)
 
@@ -876,28 +1048,22 @@ async def ask_instant_payload_handler(update: Update, context: ContextTypes.DEFA
     if not ok or parsed is None:
         await update.effective_message.reply_text(
             err,
-            parse_mode=ParseMode.HTML,
             reply_markup=inline_cancel_keyboard(),
         )
         return States.ASK_INSTANT_PAYLOAD
 
-    context.user_data["instant_parsed"] = {
-        "uids": parsed.uids,
-        "passwords": parsed.passwords,
-        "cookies": parsed.cookies,
-    }
+    context.user_data["parsed"] = parsed
     await update.effective_message.reply_text(
         "✅ <b>Data Instan Berhasil Divalidasi!</b>\n\n"
         "📝 Langkah Terakhir: <b>Masukkan nama file keluaran</b> (tanpa .xlsx).\n"
         "<i>* Cukup balas dengan karakter kosong untuk penamaan waktu otomatis.</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=inline_cancel_keyboard(),
     )
     return States.ASK_FILENAME_INSTANT
 
 
 async def ask_filename_instant_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.effective_message.text or "").strip()
+    raw = message_text(update).strip()
     if is_control_reset_text(raw):
         return await cancel_handler(update, context)
 
@@ -905,32 +1071,26 @@ async def ask_filename_instant_handler(update: Update, context: ContextTypes.DEF
     if not ok:
         await update.effective_message.reply_text(
             err,
-            parse_mode=ParseMode.HTML,
             reply_markup=inline_cancel_keyboard(),
         )
         return States.ASK_FILENAME_INSTANT
 
-    filename = build_filename(raw)
-    d = context.user_data.get("instant_parsed", {})
-    parsed = ParsedInput(
-        uids=d.get("uids", []),
-        passwords=d.get("passwords", []),
-        cookies=d.get("cookies", []),
-    )
+    parsed = context.user_data.get("parsed")
+    if parsed is None:
+        return await force_back_to_main_menu(update, context, SESSION_EXPIRED_TEXT)
 
-    progress_msg = await update.effective_message.reply_text(
-        "⏳ <i>Memparsing payload instan dan menyusun matriks Excel...</i>",
-        parse_mode=ParseMode.HTML,
-    )
-    
-    await send_xlsx_result(update, context, parsed, filename)
-    await progress_msg.delete()
+    filename = build_filename(raw)
+    rows = zip(parsed.uids, parsed.passwords, parsed.cookies, strict=True)
 
-    return await force_back_to_main_menu(
+    await send_xlsx_result(
         update,
         context,
+        rows,
+        filename,
         "🔙 Sesi Instan selesai. Sistem dikembalikan ke posisi standby.",
     )
+    hard_reset_user_session(context)
+    return ConversationHandler.END
 
 
 # -----------------------------------------------------------------------------
@@ -942,21 +1102,54 @@ async def admin_entry_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     if not user_is_admin(uid):
         await update.effective_message.reply_text(
             "⛔ <b>Akses Ditolak Terotorisasi.</b>\nArea ini dikhususkan secara eksklusif untuk staf Administrator bot.",
-            parse_mode=ParseMode.HTML,
             reply_markup=main_menu_keyboard(is_admin=False),
         )
         return ConversationHandler.END
 
     await update.effective_message.reply_text(
         "🛡️ <b>Masuk ke Panel Kontrol Administrator</b>\nSilakan tentukan aksi manajerial yang ingin Anda lakukan dari opsi di bawah:",
-        parse_mode=ParseMode.HTML,
         reply_markup=admin_menu_keyboard(),
     )
     return AdminStates.MENU
 
 
+# Tombol menu admin -> (teks instruksi, state berikutnya)
+_ADMIN_MENU_PROMPTS = {
+    ADMIN_MENU_WHITELIST: (
+        "📋 <b>Mode Pengelolaan Whitelist</b>\nKirim format eksekusi:\n"
+        "• <code>allow [ID_PENGGUNA]</code> untuk mendaftarkan\n"
+        "• <code>deny [ID_PENGGUNA]</code> untuk mencabut",
+        AdminStates.WHITELIST_INPUT,
+    ),
+    ADMIN_MENU_DURATION: (
+        "⏳ <b>Mode Pengaturan Durasi Expire</b>\nKirim format eksekusi:\n"
+        "• <code>[ID_PENGGUNA] [JUMLAH_HARI]</code>\n"
+        "<i>(Misal: 123456789 30 untuk akses aktif 30 hari)</i>",
+        AdminStates.DURATION_INPUT,
+    ),
+    ADMIN_MENU_BLOCK: (
+        "⛔ <b>Mode Restriksi Akses (Banned)</b>\nKirim format eksekusi:\n"
+        "• <code>block [ID_PENGGUNA]</code> untuk memblokir permanen\n"
+        "• <code>unblock [ID_PENGGUNA]</code> untuk melepaskan blokir",
+        AdminStates.BLOCK_INPUT,
+    ),
+    ADMIN_MENU_BROADCAST: (
+        "📣 <b>Mode Siaran Massa (Broadcast)</b>\n\nKirim pesan tekstual yang ingin Anda distribusikan ke seluruh pengguna di database:",
+        AdminStates.BROADCAST_INPUT,
+    ),
+    ADMIN_MENU_EXTRA: (
+        "🧩 <b>Modul Tambahan Administrator</b>\n\n"
+        "Fitur ini direncanakan untuk pembaruan berikutnya:\n"
+        "• 📥 Eksportasi Log Aktivitas Ringkas\n"
+        "• 🔄 Pembersihan Hard Reset Metrik\n"
+        "• 🕵️ Audit Jejak Perubahan Antar Admin",
+        AdminStates.MENU,
+    ),
+}
+
+
 async def admin_menu_router(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = (update.effective_message.text or "").strip()
+    text = message_text(update).strip()
 
     if text in {SUBMENU_CANCEL, MAIN_MENU_START}:
         return await cancel_handler(update, context)
@@ -964,50 +1157,19 @@ async def admin_menu_router(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if text == SUBMENU_BACK:
         return await force_back_to_main_menu(update, context, "🔙 Anda telah keluar dari Panel Kontrol Admin.")
 
-    if text == ADMIN_MENU_WHITELIST:
-        await update.effective_message.reply_text(
-            "📋 <b>Mode Pengelolaan Whitelist</b>\nKirim format eksekusi:\n"
-            "• <code>allow [ID_PENGGUNA]</code> untuk mendaftarkan\n"
-            "• <code>deny [ID_PENGGUNA]</code> untuk mencabut",
-            parse_mode=ParseMode.HTML,
-            reply_markup=admin_menu_keyboard(),
-        )
-        return AdminStates.WHITELIST_INPUT
-
-    if text == ADMIN_MENU_DURATION:
-        await update.effective_message.reply_text(
-            "⏳ <b>Mode Pengaturan Durasi Expire</b>\nKirim format eksekusi:\n"
-            "• <code>[ID_PENGGUNA] [JUMLAH_HARI]</code>\n"
-            "<i>(Misal: 123456789 30 untuk akses aktif 30 hari)</i>",
-            parse_mode=ParseMode.HTML,
-            reply_markup=admin_menu_keyboard(),
-        )
-        return AdminStates.DURATION_INPUT
-
-    if text == ADMIN_MENU_BLOCK:
-        await update.effective_message.reply_text(
-            "⛔ <b>Mode Restriksi Akses (Banned)</b>\nKirim format eksekusi:\n"
-            "• <code>block [ID_PENGGUNA]</code> untuk memblokir permanen\n"
-            "• <code>unblock [ID_PENGGUNA]</code> untuk melepaskan blokir",
-            parse_mode=ParseMode.HTML,
-            reply_markup=admin_menu_keyboard(),
-        )
-        return AdminStates.BLOCK_INPUT
-
-    if text == ADMIN_MENU_BROADCAST:
-        await update.effective_message.reply_text(
-            "📣 <b>Mode Siaran Massa (Broadcast)</b>\n\nKirim pesan tekstual yang ingin Anda distribusikan ke seluruh pengguna di database:",
-            parse_mode=ParseMode.HTML,
-            reply_markup=admin_menu_keyboard(),
-        )
-        return AdminStates.BROADCAST_INPUT
+    prompt = _ADMIN_MENU_PROMPTS.get(text)
+    if prompt is not None:
+        prompt_text, next_state = prompt
+        await update.effective_message.reply_text(prompt_text, reply_markup=admin_menu_keyboard())
+        return next_state
 
     if text == ADMIN_MENU_STATS:
-        store = load_store()
-        users = store.get("users", {})
-        blocked = store.get("blocked", [])
-        docs = store.get("stats", {}).get("total_docs_created", 0)
-        msgs = store.get("stats", {}).get("total_messages_processed", 0)
+        store = get_store()
+        users = store["users"]
+        blocked = store["blocked"]
+        stats = store["stats"]
+        docs = stats["total_docs_created"]
+        msgs = stats["total_messages_processed"]
 
         await update.effective_message.reply_text(
             "📊 <b>Statistik Penggunaan FBDocBot</b>\n\n"
@@ -1015,38 +1177,23 @@ async def admin_menu_router(update: Update, context: ContextTypes.DEFAULT_TYPE)
             f"🚫 Pengguna dalam Daftar Hitam: <b>{len(blocked)}</b> pengguna\n"
             f"📄 Akumulasi Dokumen Digenerasi: <b>{docs}</b> file\n"
             f"💬 Keseluruhan Perintah Diproses: <b>{msgs}</b> pesan",
-            parse_mode=ParseMode.HTML,
-            reply_markup=admin_menu_keyboard(),
-        )
-        return AdminStates.MENU
-
-    if text == ADMIN_MENU_EXTRA:
-        await update.effective_message.reply_text(
-            "🧩 <b>Modul Tambahan Administrator</b>\n\n"
-            "Fitur ini direncanakan untuk pembaruan berikutnya:\n"
-            "• 📥 Eksportasi Log Aktivitas Ringkas\n"
-            "• 🔄 Pembersihan Hard Reset Metrik\n"
-            "• 🕵️ Audit Jejak Perubahan Antar Admin",
-            parse_mode=ParseMode.HTML,
             reply_markup=admin_menu_keyboard(),
         )
         return AdminStates.MENU
 
     await update.effective_message.reply_text(
         "Tolong gunakan hanya tata navigasi Menu Admin yang tertera.",
-        parse_mode=ParseMode.HTML,
         reply_markup=admin_menu_keyboard(),
     )
     return AdminStates.MENU
 
 
 async def admin_whitelist_input_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = (update.effective_message.text or "").strip()
-    m = re.fullmatch(r"(allow|deny)\s+(\d+)", text, flags=re.IGNORECASE)
+    text = message_text(update).strip()
+    m = WHITELIST_CMD_REGEX.fullmatch(text)
     if not m:
         await update.effective_message.reply_text(
             "❌ Sintaks gagal diurai. Mohon gunakan struktur valid: <code>allow 123456789</code> atau <code>deny 123456789</code>",
-            parse_mode=ParseMode.HTML,
             reply_markup=admin_menu_keyboard(),
         )
         return AdminStates.WHITELIST_INPUT
@@ -1054,26 +1201,23 @@ async def admin_whitelist_input_handler(update: Update, context: ContextTypes.DE
     action = m.group(1).lower()
     target = int(m.group(2))
 
-    store = load_store()
-    u = ensure_user_record(store, target)
-    u["whitelisted"] = action == "allow"
-    save_store(store)
+    async with store_transaction() as store:
+        u = ensure_user_record(store, target)
+        u["whitelisted"] = action == "allow"
 
     await update.effective_message.reply_text(
         f"✅ Konfigurasi tersimpan: Whitelist untuk identitas <code>{target}</code> telah dideklarasikan menjadi <b>{u['whitelisted']}</b>.",
-        parse_mode=ParseMode.HTML,
         reply_markup=admin_menu_keyboard(),
     )
     return AdminStates.MENU
 
 
 async def admin_duration_input_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = (update.effective_message.text or "").strip()
-    m = re.fullmatch(r"(\d+)\s+(\d+)", text)
+    text = message_text(update).strip()
+    m = DURATION_CMD_REGEX.fullmatch(text)
     if not m:
         await update.effective_message.reply_text(
             "❌ Sintaks durasi tidak sah. Struktur standar yang diakui: <code>123456789 30</code>",
-            parse_mode=ParseMode.HTML,
             reply_markup=admin_menu_keyboard(),
         )
         return AdminStates.DURATION_INPUT
@@ -1083,32 +1227,28 @@ async def admin_duration_input_handler(update: Update, context: ContextTypes.DEF
     if days <= 0 or days > 3650:
         await update.effective_message.reply_text(
             "Kesalahan Limitasi: Jangka panjang durasi hari dibatasi antara nominal 1 dan 3650.",
-            parse_mode=ParseMode.HTML,
             reply_markup=admin_menu_keyboard(),
         )
         return AdminStates.DURATION_INPUT
 
-    store = load_store()
-    u = ensure_user_record(store, target)
-    exp = utc_now() + timedelta(days=days)
-    u["access_expires_at"] = to_utc_iso(exp)
-    save_store(store)
+    async with store_transaction() as store:
+        u = ensure_user_record(store, target)
+        exp = utc_now() + timedelta(days=days)
+        u["access_expires_at"] = to_utc_iso(exp)
 
     await update.effective_message.reply_text(
         f"✅ Pembaruan Expire Time diterapkan untuk <code>{target}</code>.\nMasa kadaluarsa presisi dijadwalkan pada:\n<code>{u['access_expires_at']}</code>",
-        parse_mode=ParseMode.HTML,
         reply_markup=admin_menu_keyboard(),
     )
     return AdminStates.MENU
 
 
 async def admin_block_input_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = (update.effective_message.text or "").strip()
-    m = re.fullmatch(r"(block|unblock)\s+(\d+)", text, flags=re.IGNORECASE)
+    text = message_text(update).strip()
+    m = BLOCK_CMD_REGEX.fullmatch(text)
     if not m:
         await update.effective_message.reply_text(
             "❌ Sintaks eksekusi penalti error. Struktur: <code>block 123456789</code> / <code>unblock 123456789</code>",
-            parse_mode=ParseMode.HTML,
             reply_markup=admin_menu_keyboard(),
         )
         return AdminStates.BLOCK_INPUT
@@ -1116,59 +1256,127 @@ async def admin_block_input_handler(update: Update, context: ContextTypes.DEFAUL
     action = m.group(1).lower()
     target = int(m.group(2))
 
-    store = load_store()
-    blocked = set(store.get("blocked", []))
-    if action == "block":
-        blocked.add(target)
-    else:
-        blocked.discard(target)
-    store["blocked"] = sorted(list(blocked))
-    save_store(store)
+    async with store_transaction() as store:
+        if action == "block":
+            store["blocked"].add(target)
+        else:
+            store["blocked"].discard(target)
 
     await update.effective_message.reply_text(
         f"✅ Keputusan Restriksi dikonfirmasi untuk identitas <code>{target}</code>. Aksi dilakukan: <b>{action.upper()}</b>",
-        parse_mode=ParseMode.HTML,
         reply_markup=admin_menu_keyboard(),
     )
     return AdminStates.MENU
 
 
+class RateLimiter:
+    """Membatasi laju ke `rate` izin per detik, aman dibagi antar coroutine."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1 / rate
+        self._next_slot = 0.0
+        self._resume_at = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self._interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            # Slot yang dipesan sebelum defer() jatuh di dalam jeda; antre ulang setelahnya
+            if slot >= self._resume_at:
+                return
+
+    def defer(self, seconds: float) -> None:
+        """Tahan semua pemakai limiter selama `seconds` (flood wait berlaku untuk seluruh bot)."""
+        self._resume_at = max(self._resume_at, asyncio.get_running_loop().time() + seconds)
+        self._next_slot = max(self._next_slot, self._resume_at)
+
+
+def is_dead_chat_error(exc: Exception) -> bool:
+    """True jika chat tidak akan pernah bisa dikirimi (bot diblokir user / chat tidak ditemukan)."""
+    if isinstance(exc, Forbidden):
+        return True
+    return isinstance(exc, BadRequest) and "chat not found" in exc.message.lower()
+
+
+async def send_broadcast_message(
+    bot,
+    limiter: RateLimiter,
+    chat_id: int,
+    text: str,
+    reply_markup: ReplyKeyboardMarkup,
+    dead_chats: set[int],
+) -> bool:
+    """Kirim satu pesan broadcast; jika kena flood control, tunggu lalu ulangi sekali."""
+    for attempt in range(2):
+        await limiter.wait()
+        try:
+            await bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
+            return True
+        except RetryAfter as e:
+            if attempt:
+                return False
+            delay = e.retry_after
+            # Jeda diterapkan ke limiter bersama agar worker lain ikut berhenti, bukan hanya worker ini
+            limiter.defer((delay.total_seconds() if isinstance(delay, timedelta) else delay) + 0.5)
+        except Exception as e:
+            if is_dead_chat_error(e):
+                dead_chats.add(chat_id)
+            return False
+    return False
+
+
 async def admin_broadcast_input_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    message = (update.effective_message.text or "").strip()
+    message = message_text(update).strip()
     if not message:
         await update.effective_message.reply_text(
             "Kesalahan Pengiriman: Konten Broadcast ditolak karena kosong.",
-            parse_mode=ParseMode.HTML,
             reply_markup=admin_menu_keyboard(),
         )
         return AdminStates.BROADCAST_INPUT
 
-    store = load_store()
-    users = [int(uid) for uid in store.get("users", {}).keys() if uid.isdigit()]
-    success = 0
-    failed = 0
-
-    for uid in users:
-        try:
-            await context.bot.send_message(
-                chat_id=uid,
-                text=f"📢 <b>Kawat Resmi Administrasi</b>\n\n{message}",
-                parse_mode=ParseMode.HTML,
-                reply_markup=main_menu_keyboard(is_admin=user_is_admin(uid)),
+    store = get_store()
+    # Lewati user yang diblokir admin dan chat yang sudah diketahui tidak bisa dikirimi
+    blocked = store["blocked"]
+    known_dead = store["dead_chats"]
+    users = [uid for uid in store["users"] if uid not in blocked and uid not in known_dead]
+    skipped = len(store["users"]) - len(users)
+    dead: set[int] = set()
+    body = f"📢 <b>Kawat Resmi Administrasi</b>\n\n{message}"
+    limiter = RateLimiter(BROADCAST_RATE_PER_SEC)
+    # Worker dengan jumlah tetap mengambil target dari satu iterator bersama,
+    # sehingga jumlah coroutine tidak ikut membesar seiring jumlah user
+    targets = iter(users)
+
+    async def worker() -> int:
+        delivered = 0
+        for uid in targets:
+            delivered += await send_broadcast_message(
+                context.bot,
+                limiter,
+                uid,
+                body,
+                main_menu_keyboard(is_admin=user_is_admin(uid)),
+                dead,
             )
-            success += 1
-        except Exception:
-            failed += 1
+        return delivered
 
-    store["stats"]["last_broadcast_at"] = to_utc_iso(utc_now())
-    save_store(store)
+    success = sum(await asyncio.gather(*(worker() for _ in range(BROADCAST_CONCURRENCY))))
+    failed = len(users) - success
+
+    async with store_transaction() as store:
+        store["stats"]["last_broadcast_at"] = to_utc_iso(utc_now())
+        store["dead_chats"] |= dead
 
     await update.effective_message.reply_text(
         f"✅ Rutin Pengiriman Broadcast Massa Selesai Secara Global.\n\n"
         f"Laporan Pengiriman:\n"
         f"📩 Masuk Berhasil: <b>{success}</b> transmisi\n"
-        f"📉 Gagal Target: <b>{failed}</b> (Blokir bot dsb.)",
-        parse_mode=ParseMode.HTML,
+        f"📉 Gagal Target: <b>{failed}</b> (Blokir bot dsb.)\n"
+        f"💤 Dilewati: <b>{skipped}</b> (diblokir / chat tidak aktif)",
         reply_markup=admin_menu_keyboard(),
     )
     return AdminStates.MENU
@@ -1178,50 +1386,50 @@ async def admin_broadcast_input_handler(update: Update, context: ContextTypes.DE
 # Global Router
 # -----------------------------------------------------------------------------
 
-async def global_text_router(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    text = (update.effective_message.text or "").strip()
-    uid = current_user_id(update)
-
-    # Hard reset controls
-    if text in {MAIN_MENU_START, "Start", "/start", SUBMENU_CANCEL, "Batal"}:
-        await start_handler(update, context)
-        return
+async def back_to_main_menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    await update.effective_message.reply_text(
+        "🔙 Menuju Tampilan Menu Utama.",
+        reply_markup=main_menu_keyboard(is_admin=user_is_admin(current_user_id(update))),
+    )
 
-    if text == MAIN_MENU_CREATE_DOC:
-        await menu_create_doc_handler(update, context)
-        return
 
-    if text == MAIN_MENU_HELP:
-        await help_handler(update, context)
-        return
+# Teks tombol -> handler; satu lookup dict menggantikan rantai if per pesan
+_GLOBAL_TEXT_ROUTES = {
+    # Hard reset controls
+    MAIN_MENU_START: start_handler,
+    "Start": start_handler,
+    "/start": start_handler,
+    SUBMENU_CANCEL: start_handler,
+    "Batal": start_handler,
+    MAIN_MENU_CREATE_DOC: menu_create_doc_handler,
+    MAIN_MENU_HELP: help_handler,
+    MAIN_MENU_INVENTORY: inventori.inventory_menu_handler,
+    SUBMENU_BACK: back_to_main_menu_handler,
+    SUBMENU_MANUAL: manual_start_handler,
+    SUBMENU_INSTANT: instant_start_handler,
+    MAIN_MENU_ADMIN: admin_entry_handler,
+}
 
-    if text == MAIN_MENU_INVENTORY:
-        await inventori.inventory_menu_handler(update, context)
-        return
 
-    if text == SUBMENU_BACK:
+async def global_text_router(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    uid = current_user_id(update)
+    # User yang diblokir langsung ditolak sebelum routing (cek set O(1), tanpa tulis store)
+    if user_is_blocked(get_store(), uid):
         await update.effective_message.reply_text(
-            "🔙 Menuju Tampilan Menu Utama.",
-            parse_mode=ParseMode.HTML,
+            BLOCKED_TEXT,
             reply_markup=main_menu_keyboard(is_admin=user_is_admin(uid)),
         )
         return
 
-    if text == SUBMENU_MANUAL:
-        await manual_start_handler(update, context)
-        return
-
-    if text == SUBMENU_INSTANT:
-        await instant_start_handler(update, context)
-        return
+    text = message_text(update).strip()
 
-    if text == MAIN_MENU_ADMIN:
-        await admin_entry_handler(update, context)
+    handler = _GLOBAL_TEXT_ROUTES.get(text)
+    if handler is not None:
+        await handler(update, context)
         return
 
     await update.effective_message.reply_text(
         "🤖 <i>Perintah teks tidak cocok dengan navigasi antarmuka apapun. Silakan manfaatkan papan tombol interaktif di bawah.</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=main_menu_keyboard(is_admin=user_is_admin(uid)),
     )
 
@@ -1234,6 +1442,70 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
 # App Setup
 # -----------------------------------------------------------------------------
 
+class ChatUpdateProcessor(BaseUpdateProcessor):
+    """Update dari chat yang sama diproses berurutan, antar chat tetap paralel."""
+
+    # ConversationHandler mengandalkan update diproses satu per satu; cukup dijamin per chat
+    __slots__ = ("_locks", "_running")
+
+    def __init__(self, max_concurrent_updates: int, max_backlog: int) -> None:
+        # Semaphore bawaan PTB sudah diambil sebelum do_process_update, juga oleh update yang
+        # masih antre di lock chat-nya; jadi batas bawaan hanya membatasi backlog, sedangkan
+        # batas eksekusi dipegang _running yang baru diambil setelah giliran chat didapat
+        super().__init__(max_backlog)
+        self._running = asyncio.Semaphore(max_concurrent_updates)
+        # chat_id -> [lock, jumlah update yang sedang memegang/menunggu lock]
+        self._locks: Dict[int, list] = {}
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = None
+        if isinstance(update, Update):
+            if update.effective_chat:
+                key = update.effective_chat.id
+            elif update.effective_user:
+                key = update.effective_user.id
+        if key is None:
+            async with self._running:
+                await coroutine
+            return
+
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0], self._running:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+async def start_background_tasks(app: Application) -> None:
+    get_store()
+    app.bot_data["store_flusher"] = asyncio.create_task(store_flusher())
+
+
+async def shutdown_resources(app: Application) -> None:
+    flusher = app.bot_data.pop("store_flusher", None)
+    if flusher is not None:
+        flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await flusher
+    await flush_store()
+
+    pool = app.bot_data.pop("xlsx_pool", None)
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
 def build_application() -> Application:
     token = os.getenv("TELEGRAM_TOKEN")
     if not token:
@@ -1241,15 +1513,39 @@ def build_application() -> Application:
             "TELEGRAM_TOKEN tidak ditemukan. Isi TELEGRAM_TOKEN di environment/.env."
         )
 
-    app = Application.builder().token(token).build()
+    app = (
+        Application.builder()
+        .token(token)
+        # Semua pesan bot berformat HTML (termasuk handler inventori)
+        .defaults(Defaults(parse_mode=ParseMode.HTML))
+        .concurrent_updates(ChatUpdateProcessor(UPDATE_CONCURRENCY, UPDATE_BACKLOG_LIMIT))
+        .post_init(start_background_tasks)
+        .post_shutdown(shutdown_resources)
+        .build()
+    )
+    app.bot_data["xlsx_pool"] = ThreadPoolExecutor(
+        max_workers=XLSX_MAX_WORKERS, thread_name_prefix="xlsx"
+    )
 
     inventori.register_inventory_handlers(app, guard_access)
 
+    # Handler PTB tidak menyimpan state, jadi instance yang sama aman dipakai bersama antar conversation
+    common_fallbacks = [
+        CommandHandler("cancel", cancel_handler),
+        MessageHandler(filters.Text([SUBMENU_CANCEL]), cancel_handler),
+        CommandHandler("start", start_handler),
+        MessageHandler(filters.Text([MAIN_MENU_START]), start_handler),
+    ]
+    doc_fallbacks = [
+        *common_fallbacks,
+        CallbackQueryHandler(cancel_callback, pattern="^cancel_input$"),
+    ]
+
     # Manual conversation
     manual_conv = ConversationHandler(
         entry_points=[
             CommandHandler("manual", manual_start_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(SUBMENU_MANUAL)}$"), manual_start_handler),
+            MessageHandler(filters.Text([SUBMENU_MANUAL]), manual_start_handler),
         ],
         states={
             States.ASK_UID: [MessageHandler(filters.TEXT & ~filters.COMMAND, ask_uid_handler)],
@@ -1257,13 +1553,7 @@ def build_application() -> Application:
             States.ASK_COOKIE: [MessageHandler(filters.TEXT & ~filters.COMMAND, ask_cookie_handler)],
             States.ASK_FILENAME_MANUAL: [MessageHandler(filters.TEXT & ~filters.COMMAND, ask_filename_manual_handler)],
         },
-        fallbacks=[
-            CommandHandler("cancel", cancel_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(SUBMENU_CANCEL)}$"), cancel_handler),
-            CommandHandler("start", start_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(MAIN_MENU_START)}$"), start_handler),
-            CallbackQueryHandler(cancel_callback, pattern="^cancel_input$"),
-        ],
+        fallbacks=doc_fallbacks,
         allow_reentry=True,
         name="manual_conversation",
         persistent=False,
@@ -1273,19 +1563,13 @@ def build_application() -> Application:
     instant_conv = ConversationHandler(
         entry_points=[
             CommandHandler("instan", instant_start_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(SUBMENU_INSTANT)}$"), instant_start_handler),
+            MessageHandler(filters.Text([SUBMENU_INSTANT]), instant_start_handler),
         ],
         states={
             States.ASK_INSTANT_PAYLOAD: [MessageHandler(filters.TEXT & ~filters.COMMAND, ask_instant_payload_handler)],
             States.ASK_FILENAME_INSTANT: [MessageHandler(filters.TEXT & ~filters.COMMAND, ask_filename_instant_handler)],
         },
-        fallbacks=[
-            CommandHandler("cancel", cancel_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(SUBMENU_CANCEL)}$"), cancel_handler),
-            CommandHandler("start", start_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(MAIN_MENU_START)}$"), start_handler),
-            CallbackQueryHandler(cancel_callback, pattern="^cancel_input$"),
-        ],
+        fallbacks=doc_fallbacks,
         allow_reentry=True,
         name="instant_conversation",
         persistent=False,
@@ -1295,7 +1579,7 @@ def build_application() -> Application:
     admin_conv = ConversationHandler(
         entry_points=[
             CommandHandler("admin", admin_entry_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(MAIN_MENU_ADMIN)}$"), admin_entry_handler),
+            MessageHandler(filters.Text([MAIN_MENU_ADMIN]), admin_entry_handler),
         ],
         states={
             AdminStates.MENU: [MessageHandler(filters.TEXT & ~filters.COMMAND, admin_menu_router)],
@@ -1304,12 +1588,7 @@ def build_application() -> Application:
             AdminStates.BLOCK_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND, admin_block_input_handler)],
             AdminStates.BROADCAST_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND, admin_broadcast_input_handler)],
         },
-        fallbacks=[
-            CommandHandler("cancel", cancel_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(SUBMENU_CANCEL)}$"), cancel_handler),
-            CommandHandler("start", start_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(MAIN_MENU_START)}$"), start_handler),
-        ],
+        fallbacks=common_fallbacks,
         allow_reentry=True,
         name="admin_conversation",
         persistent=False,
@@ -8,15 +8,14 @@ Inventori Module
 
 from __future__ import annotations
 
-import io
+import asyncio
 import re
+import string
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import IntEnum
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, List, Optional
 
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -26,7 +25,6 @@ from telegram import (
     ReplyKeyboardRemove,
     Update,
 )
-from telegram.constants import ParseMode
 from telegram.ext import (
     CallbackQueryHandler,
     CommandHandler,
@@ -36,6 +34,8 @@ from telegram.ext import (
     filters,
 )
 
+import xlsxutil
+
 INVENTORY_MENU_LABEL = "📦 Stored XIE"
 INVENTORY_SUBMENU_START = "🚀 Start"
 INVENTORY_SUBMENU_INPUT = "➕ Input"
@@ -46,9 +46,8 @@ INVENTORY_SUBMENU_BACK = "🔙 Kembali"
 EFFECT_FIRE = "5104841245755180586"
 EFFECT_TADA = "5046509860389126442"
 
-PASSWORD_REGEX = re.compile(r"^[^\s]{6,64}$")
-UID_REGEX = re.compile(r"^\d{8,20}$")
-FILENAME_REGEX = re.compile(r"^[A-Za-z0-9_-]{1,50}$")
+# Setara ^[A-Za-z0-9_-]{1,50}$, dicek dengan set karakter (lihat _is_valid_filename)
+FILENAME_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
 COOKIE_UID_REGEX = re.compile(r"(?:^|;)\s*c_user=(\d+)")
 COOKIE_XS_REGEX = re.compile(r"(?:^|;)\s*xs=")
 
@@ -95,27 +94,55 @@ def _user_id(update: Update) -> Optional[int]:
     return update.effective_user.id if update.effective_user else None
 
 
+def _message_text(update: Update) -> str:
+    return update.effective_message.text or ""
+
+
+# Markup PTB bersifat immutable, jadi aman dipakai bersama antar user/pesan
+_INVENTORY_MENU_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(INVENTORY_SUBMENU_INPUT), KeyboardButton(INVENTORY_SUBMENU_INFO)],
+        [KeyboardButton(INVENTORY_SUBMENU_START), KeyboardButton(INVENTORY_SUBMENU_BACK)],
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=False,
+)
+
+_SKIP_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⏭️ Skip Password", callback_data="inv_skip_password")]
+])
+
+_INLINE_CANCEL_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❌ Batal & Kembali", callback_data="inv_cancel_input")]
+])
+
+_REMOVE_KB = ReplyKeyboardRemove()
+
+
 def _inventory_menu_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(INVENTORY_SUBMENU_INPUT), KeyboardButton(INVENTORY_SUBMENU_INFO)],
-            [KeyboardButton(INVENTORY_SUBMENU_START), KeyboardButton(INVENTORY_SUBMENU_BACK)],
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=False,
-    )
+    return _INVENTORY_MENU_KB
 
 
 def _skip_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup([
-        [InlineKeyboardButton("⏭️ Skip Password", callback_data="inv_skip_password")]
-    ])
+    return _SKIP_KB
 
 
 def _inline_cancel_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup([
-        [InlineKeyboardButton("❌ Batal & Kembali", callback_data="inv_cancel_input")]
-    ])
+    return _INLINE_CANCEL_KB
+
+
+def _is_valid_uid(uid: str) -> bool:
+    # Setara ^\d{8,20}$; isdecimal() = kelas \d pada regex str
+    return 8 <= len(uid) <= 20 and uid.isdecimal()
+
+
+def _is_valid_password(pwd: str) -> bool:
+    # Setara ^[^\s]{6,64}$; split() hanya mengembalikan [pwd] jika tanpa whitespace
+    return 6 <= len(pwd) <= 64 and pwd.split() == [pwd]
+
+
+def _is_valid_filename(name: str) -> bool:
+    return 1 <= len(name) <= 50 and FILENAME_CHARS.issuperset(name)
 
 
 def _validate_cookie_minimal(cookie: str) -> tuple[bool, str]:
@@ -131,7 +158,7 @@ def _extract_uid(cookie: str) -> Optional[str]:
     if not m:
         return None
     uid = m.group(1).strip()
-    if not UID_REGEX.fullmatch(uid):
+    if not _is_valid_uid(uid):
         return None
     return uid
 
@@ -140,7 +167,7 @@ def _validate_filename(raw: str) -> tuple[bool, str]:
     s = raw.strip()
     if not s:
         return True, ""
-    if not FILENAME_REGEX.fullmatch(s):
+    if not _is_valid_filename(s):
         return (
             False,
             "❌ <b>Nama file tidak valid.</b>\n\n"
@@ -191,7 +218,6 @@ async def inventory_menu_handler(update: Update, context: ContextTypes.DEFAULT_T
         "📦 <b>Sistem Inventori Aktif</b>\n\n"
         "Area untuk mengumpulkan dan menyimpan sementara data akun Anda sebelum dicetak menjadi Excel.\n\n"
         "👉 <i>Pilih aksi yang ingin Anda lakukan:</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=_inventory_menu_keyboard(),
         message_effect_id=EFFECT_FIRE
     )
@@ -212,8 +238,7 @@ async def inventory_input_start_handler(update: Update, context: ContextTypes.DE
     try:
         tmp_msg = await update.effective_message.reply_text(
             "🔄 <i>Menyiapkan UI...</i>",
-            parse_mode=ParseMode.HTML,
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=_REMOVE_KB
         )
         await tmp_msg.delete()
     except Exception:
@@ -222,20 +247,18 @@ async def inventory_input_start_handler(update: Update, context: ContextTypes.DE
     await update.effective_message.reply_text(
         "🧾 <b>Input Inventori [Langkah 1/2]</b>\n\n"
         "👉 Silakan kirimkan <b>Cookie Lengkap</b> dari akun Anda.",
-        parse_mode=ParseMode.HTML,
         reply_markup=_inline_cancel_keyboard(),
     )
     return InventoryStates.ASK_COOKIE
 
 
 async def inventory_cookie_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.effective_message.text or "").strip()
+    raw = _message_text(update).strip()
     
     # Deteksi fallback kembali
     if raw in {INVENTORY_SUBMENU_BACK, "Batal", "/start"}:
         await update.effective_message.reply_text(
             "❎ Input dibatalkan.",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inventory_menu_keyboard()
         )
         context.user_data.pop("inv_pending", None)
@@ -245,7 +268,6 @@ async def inventory_cookie_handler(update: Update, context: ContextTypes.DEFAULT
     if not ok:
         await update.effective_message.reply_text(
             f"❌ <b>Cookie Ditolak.</b>\n💡 {reason}",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inline_cancel_keyboard(),
         )
         return InventoryStates.ASK_COOKIE
@@ -255,7 +277,6 @@ async def inventory_cookie_handler(update: Update, context: ContextTypes.DEFAULT
         await update.effective_message.reply_text(
             "❌ <b>Gagal Mendeteksi UID.</b>\n"
             "Pastikan cookie memiliki <code>c_user=</code> yang terformat dengan benar.",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inline_cancel_keyboard(),
         )
         return InventoryStates.ASK_COOKIE
@@ -266,30 +287,27 @@ async def inventory_cookie_handler(update: Update, context: ContextTypes.DEFAULT
         "🔐 <b>Input Inventori [Langkah 2/2]</b>\n"
         "👉 Silakan masukkan <b>Password</b> untuk akun ini.\n"
         "<i>* Anda dapat menekan tombol Skip jika tidak ingin menyertakan password.</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=_skip_keyboard(),
     )
     return InventoryStates.ASK_PASSWORD
 
 
 async def inventory_password_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.effective_message.text or "").strip()
+    raw = _message_text(update).strip()
     
     if raw in {INVENTORY_SUBMENU_BACK, "Batal", "/start"}:
         await update.effective_message.reply_text(
             "❎ Input dibatalkan.",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inventory_menu_keyboard()
         )
         context.user_data.pop("inv_pending", None)
         return ConversationHandler.END
 
-    if not PASSWORD_REGEX.fullmatch(raw):
+    if not _is_valid_password(raw):
         await update.effective_message.reply_text(
             "❌ <b>Password Tidak Valid.</b>\n"
             "📌 Syarat: 6–64 karakter dan tidak boleh ada spasi.\n"
             "<i>(Gunakan tombol <b>Skip Password</b> di atas jika kosong)</i>",
-            parse_mode=ParseMode.HTML,
         )
         return InventoryStates.ASK_PASSWORD
 
@@ -299,7 +317,6 @@ async def inventory_password_handler(update: Update, context: ContextTypes.DEFAU
     if not uid or not cookie:
         await update.effective_message.reply_text(
             "❌ <b>Sesi Pending Hilang.</b> Silakan ulangi input dari awal.",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inventory_menu_keyboard(),
         )
         return ConversationHandler.END
@@ -315,7 +332,6 @@ async def inventory_password_handler(update: Update, context: ContextTypes.DEFAU
         f"👤 <b>UID:</b> <code>{uid}</code>\n"
         f"🔑 <b>Password:</b> <code>{raw}</code>\n"
         f"🕒 <b>Waktu:</b> <code>{_utc_now_iso()}</code>",
-        parse_mode=ParseMode.HTML,
         reply_markup=_inventory_menu_keyboard(),
         message_effect_id=EFFECT_TADA
     )
@@ -333,12 +349,10 @@ async def inventory_password_skip_callback(update: Update, context: ContextTypes
     if not uid or not cookie:
         await query.edit_message_text(
             "❌ <b>Sesi Pending Hilang.</b> Silakan ulangi input dari awal.",
-            parse_mode=ParseMode.HTML,
         )
         await context.bot.send_message(
             chat_id=query.message.chat_id,
             text="🔙 <b>Kembali ke Menu Inventori.</b>",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inventory_menu_keyboard()
         )
         return ConversationHandler.END
@@ -354,13 +368,11 @@ async def inventory_password_skip_callback(update: Update, context: ContextTypes
         f"👤 <b>UID:</b> <code>{uid}</code>\n"
         f"🔑 <b>Password:</b> <i>(Dikosongkan)</i>\n"
         f"🕒 <b>Waktu:</b> <code>{_utc_now_iso()}</code>",
-        parse_mode=ParseMode.HTML,
     )
     
     await context.bot.send_message(
         chat_id=query.message.chat_id,
         text="✨ <b>Data telah diamankan di Inventori.</b>",
-        parse_mode=ParseMode.HTML,
         reply_markup=_inventory_menu_keyboard(),
         message_effect_id=EFFECT_TADA
     )
@@ -377,13 +389,11 @@ async def inventory_cancel_callback(update: Update, context: ContextTypes.DEFAUL
     
     await query.edit_message_text(
         "❎ <i>Anda membatalkan aksi pada sesi ini. Proses dihentikan.</i>",
-        parse_mode=ParseMode.HTML
     )
     
     await context.bot.send_message(
         chat_id=query.message.chat_id,
         text="🔙 <b>Kembali ke Menu Inventori.</b>",
-        parse_mode=ParseMode.HTML,
         reply_markup=_inventory_menu_keyboard()
     )
     return ConversationHandler.END
@@ -393,50 +403,19 @@ async def inventory_cancel_callback(update: Update, context: ContextTypes.DEFAUL
 # Start Flow (Ask Filename & Generate XLSX)
 # -----------------------------------------------------------------------------
 
-def _build_inventory_xlsx(entries: List[InventoryEntry]) -> io.BytesIO:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "INVENTORY"
-
-    headers = ["UID", "PASSWORD", "COOKIE"]
-    ws.append(headers)
+def _build_inventory_xlsx(entries: List[InventoryEntry]) -> BinaryIO:
+    wb, ws = xlsxutil.new_workbook("INVENTORY")
+    ws.freeze_panes = "A2"
 
+    xlsxutil.append_header(ws)
     for e in entries:
-        ws.append([e.uid, e.password, e.cookie])
-
-    header_font = Font(name="Calibri", size=13, bold=True, color="FFFFFF")
-    data_font = Font(name="Calibri", size=11)
-    header_fill = PatternFill(fill_type="solid", fgColor="1F4E78")
-    medium_side = Side(style="medium", color="000000")
-    all_border = Border(left=medium_side, right=medium_side, top=medium_side, bottom=medium_side)
-
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.border = all_border
-
-    max_row = ws.max_row
-    for r in range(2, max_row + 1):
-        for c in range(1, 4):
-            cell = ws.cell(row=r, column=c)
-            cell.font = data_font
-            cell.border = all_border
-            cell.alignment = Alignment(
-                horizontal="left",
-                vertical="center",
-                wrap_text=(c == 3),
-            )
-
-    ws.column_dimensions["A"].width = 22
-    ws.column_dimensions["B"].width = 25
-    ws.column_dimensions["C"].width = 80
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = f"A1:C{max_row}"
-    ws.row_dimensions[1].height = 24
+        xlsxutil.append_data_row(ws, (e.uid, e.password, e.cookie))
+
+    ws.auto_filter.ref = f"A1:C{len(entries) + 1}"
 
-    output = io.BytesIO()
-    wb.save(output)
+    # Inventori bisa terus bertambah; file besar di-spool ke disk, bukan ditahan di RAM
+    output = xlsxutil.new_output()
+    xlsxutil.save_workbook(wb, output)
     output.seek(0)
     return output
 
@@ -454,7 +433,6 @@ async def inventory_start_handler(update: Update, context: ContextTypes.DEFAULT_
         await update.effective_message.reply_text(
             "⚠️ <b>Inventori Anda Masih Kosong!</b>\n"
             "Silakan tambahkan minimal 1 akun melalui menu <b>➕ Input</b> sebelum membuat file Excel.",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inventory_menu_keyboard(),
         )
         return ConversationHandler.END
@@ -463,8 +441,7 @@ async def inventory_start_handler(update: Update, context: ContextTypes.DEFAULT_
     try:
         tmp_msg = await update.effective_message.reply_text(
             "🔄 <i>Menyiapkan UI...</i>",
-            parse_mode=ParseMode.HTML,
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=_REMOVE_KB
         )
         await tmp_msg.delete()
     except Exception:
@@ -474,19 +451,17 @@ async def inventory_start_handler(update: Update, context: ContextTypes.DEFAULT_
         "📝 <b>Pembuatan File Inventori</b>\n\n"
         "👉 <b>Masukkan Nama File Excel</b> (tanpa .xlsx)\n"
         "<i>* Kosongkan pesan (atau ketik bebas) jika ingin menggunakan nama waktu otomatis.</i>",
-        parse_mode=ParseMode.HTML,
         reply_markup=_inline_cancel_keyboard(),
     )
     return InventoryStates.ASK_FILENAME
 
 
 async def inventory_filename_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.effective_message.text or "").strip()
+    raw = _message_text(update).strip()
 
     if raw in {INVENTORY_SUBMENU_BACK, "Batal", "/start"}:
         await update.effective_message.reply_text(
             "❎ Proses pembuatan file dibatalkan.",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inventory_menu_keyboard()
         )
         return ConversationHandler.END
@@ -495,7 +470,6 @@ async def inventory_filename_handler(update: Update, context: ContextTypes.DEFAU
     if not ok:
         await update.effective_message.reply_text(
             err,
-            parse_mode=ParseMode.HTML,
             reply_markup=_inline_cancel_keyboard(),
         )
         return InventoryStates.ASK_FILENAME
@@ -506,24 +480,29 @@ async def inventory_filename_handler(update: Update, context: ContextTypes.DEFAU
     if not entries:
         await update.effective_message.reply_text(
             "⚠️ Data inventori kosong secara tiba-tiba.",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inventory_menu_keyboard(),
         )
         return ConversationHandler.END
 
     filename = _build_filename(raw)
-    buffer = _build_inventory_xlsx(entries)
+    # Render di thread pool XLSX aplikasi (bot_data["xlsx_pool"]) agar event loop tetap melayani chat lain
+    loop = asyncio.get_running_loop()
+    buffer = await loop.run_in_executor(
+        context.application.bot_data["xlsx_pool"], _build_inventory_xlsx, entries
+    )
     
     await update.effective_chat.send_message(
         text=f"✨ <b>Sukses Membuat Dokumen!</b>\nTotal <b>{len(entries)}</b> akun telah dirender ke dalam Excel dan <b>data inventori Anda telah di-reset (dikosongkan) otomatis</b>. Silakan unduh file Anda di bawah ini.",
-        parse_mode=ParseMode.HTML,
         message_effect_id=EFFECT_TADA
     )
 
-    await update.effective_chat.send_document(
-        document=InputFile(buffer, filename=filename),
-        reply_markup=_inventory_menu_keyboard(),
-    )
+    with buffer:
+        await update.effective_chat.send_document(
+            document=InputFile(
+                xlsxutil.upload_content(buffer), filename=filename, read_file_handle=False
+            ),
+            reply_markup=_inventory_menu_keyboard(),
+        )
     
     # Reset/clear the in-memory store for the user after generating the document
     if user_id in _INVENTORY_STORE:
@@ -552,7 +531,6 @@ async def inventory_info_handler(update: Update, context: ContextTypes.DEFAULT_T
     if not entries:
         await update.effective_message.reply_text(
             "ℹ️ <b>Status Inventori Kosong</b>\nBelum ada akun yang Anda masukkan ke dalam sistem saat ini.",
-            parse_mode=ParseMode.HTML,
             reply_markup=_inventory_menu_keyboard(),
         )
         return ConversationHandler.END
@@ -564,7 +542,6 @@ async def inventory_info_handler(update: Update, context: ContextTypes.DEFAULT_T
         f"👤 <b>UID Input Terakhir:</b> <code>{meta.last_uid}</code>\n"
         f"🔑 <b>Status Password Terakhir:</b> {password_status}\n"
         f"🕒 <b>Waktu Input Terakhir:</b> <code>{meta.last_input_at}</code>\n",
-        parse_mode=ParseMode.HTML,
         reply_markup=_inventory_menu_keyboard(),
     )
     return ConversationHandler.END
@@ -579,16 +556,22 @@ def register_inventory_handlers(app, guard_access) -> None:
 
     # Menu entry
     app.add_handler(CommandHandler("inventori", inventory_menu_handler))
-    app.add_handler(MessageHandler(filters.Regex(f"^{re.escape(INVENTORY_MENU_LABEL)}$"), inventory_menu_handler))
+    app.add_handler(MessageHandler(filters.Text([INVENTORY_MENU_LABEL]), inventory_menu_handler))
 
     # Info submenu
-    app.add_handler(MessageHandler(filters.Regex(f"^{re.escape(INVENTORY_SUBMENU_INFO)}$"), inventory_info_handler))
+    app.add_handler(MessageHandler(filters.Text([INVENTORY_SUBMENU_INFO]), inventory_info_handler))
+
+    # Dipakai bersama oleh kedua conversation inventori
+    fallbacks = [
+        CommandHandler("inventori", inventory_menu_handler),
+        CallbackQueryHandler(inventory_cancel_callback, pattern="^inv_cancel_input$"),
+    ]
 
     # Input conversation
     inv_conv = ConversationHandler(
         entry_points=[
             CommandHandler("inventori_input", inventory_input_start_handler),
-            MessageHandler(filters.Regex(f"^{re.escape(INVENTORY_SUBMENU_INPUT)}$"), inventory_input_start_handler),
+            MessageHandler(filters.Text([INVENTORY_SUBMENU_INPUT]), inventory_input_start_handler),
         ],
         states={
             InventoryStates.ASK_COOKIE: [
@@ -600,10 +583,7 @@ def register_inventory_handlers(app, guard_access) -> None:
                 CallbackQueryHandler(inventory_password_skip_callback, pattern="^inv_skip_password$")
             ],
         },
-        fallbacks=[
-            CommandHandler("inventori", inventory_menu_handler),
-            CallbackQueryHandler(inventory_cancel_callback, pattern="^inv_cancel_input$"),
-        ],
+        fallbacks=fallbacks,
         allow_reentry=True,
         name="inventori_conversation",
         persistent=False,
@@ -613,15 +593,12 @@ def register_inventory_handlers(app, guard_access) -> None:
     # Generate/Start conversation
     gen_conv = ConversationHandler(
         entry_points=[
-            MessageHandler(filters.Regex(f"^{re.escape(INVENTORY_SUBMENU_START)}$"), inventory_start_handler),
+            MessageHandler(filters.Text([INVENTORY_SUBMENU_START]), inventory_start_handler),
         ],
         states={
             InventoryStates.ASK_FILENAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, inventory_filename_handler)],
         },
-        fallbacks=[
-            CommandHandler("inventori", inventory_menu_handler),
-            CallbackQueryHandler(inventory_cancel_callback, pattern="^inv_cancel_input$"),
-        ],
+        fallbacks=fallbacks,
         allow_reentry=True,
         name="inventori_gen_conversation",
         persistent=False,
@@ -0,0 +1,115 @@
+"""
+XLSX Helper
+- Style & layout bersama untuk dokumen fbdocbotx dan inventori
+- Dipisah ke modul sendiri agar kedua modul bisa memakainya tanpa import melingkar
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import zipfile
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Tuple
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.writer.excel import ExcelWriter
+
+if TYPE_CHECKING:
+    from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+
+HEADERS = ("UID", "PASSWORD", "COOKIE")
+# File langsung diupload lalu dibuang, jadi deflate cepat lebih penting dari ukuran minimal
+XLSX_COMPRESS_LEVEL = 1
+# File hasil di bawah ukuran ini tetap di RAM, selebihnya dialihkan ke disk
+XLSX_SPOOL_MAX_SIZE = 2 * 1024 * 1024
+
+_HEADER_FONT = Font(name="Calibri", size=13, bold=True, color="FFFFFF")
+_DATA_FONT = Font(name="Calibri", size=11)
+_HEADER_FILL = PatternFill(fill_type="solid", fgColor="1F4E78")
+_MEDIUM_SIDE = Side(style="medium", color="000000")
+_ALL_BORDER = Border(left=_MEDIUM_SIDE, right=_MEDIUM_SIDE, top=_MEDIUM_SIDE, bottom=_MEDIUM_SIDE)
+_ALIGN_CENTER_WRAP = Alignment(horizontal="center", vertical="center", wrap_text=True)
+_ALIGN_LEFT = Alignment(horizontal="left", vertical="center", wrap_text=False)
+_ALIGN_LEFT_WRAP = Alignment(horizontal="left", vertical="center", wrap_text=True)
+
+_HEADER_STYLE = "fbdoc_header"
+_DATA_STYLE = "fbdoc_data"
+_DATA_WRAP_STYLE = "fbdoc_data_wrap"
+
+# Nama NamedStyle per kolom data: UID, PASSWORD, COOKIE
+_DATA_COLUMN_STYLES = (_DATA_STYLE, _DATA_STYLE, _DATA_WRAP_STYLE)
+
+
+def _add_named_styles(wb: Workbook) -> None:
+    """NamedStyle terikat ke satu workbook, jadi didaftarkan ulang untuk setiap file."""
+    wb.add_named_style(NamedStyle(
+        name=_HEADER_STYLE,
+        font=_HEADER_FONT,
+        fill=_HEADER_FILL,
+        border=_ALL_BORDER,
+        alignment=_ALIGN_CENTER_WRAP,
+    ))
+    wb.add_named_style(NamedStyle(
+        name=_DATA_STYLE, font=_DATA_FONT, border=_ALL_BORDER, alignment=_ALIGN_LEFT
+    ))
+    wb.add_named_style(NamedStyle(
+        name=_DATA_WRAP_STYLE, font=_DATA_FONT, border=_ALL_BORDER, alignment=_ALIGN_LEFT_WRAP
+    ))
+
+
+def new_workbook(title: str) -> Tuple[Workbook, WriteOnlyWorksheet]:
+    """Workbook write-only dengan style terdaftar dan satu sheet berukuran kolom standar."""
+    wb = Workbook(write_only=True)
+    _add_named_styles(wb)
+    ws = wb.create_sheet(title)
+
+    # Write-only sheet: dimensions & views harus di-set sebelum append pertama
+    ws.column_dimensions["A"].width = 22
+    ws.column_dimensions["B"].width = 25
+    ws.column_dimensions["C"].width = 80
+    ws.row_dimensions[1].height = 24
+    return wb, ws
+
+
+def append_header(ws: WriteOnlyWorksheet) -> None:
+    row = []
+    for h in HEADERS:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.style = _HEADER_STYLE
+        row.append(cell)
+    ws.append(row)
+
+
+def append_data_row(ws: WriteOnlyWorksheet, values: Iterable[str]) -> None:
+    row = []
+    for value, style in zip(values, _DATA_COLUMN_STYLES):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        row.append(cell)
+    ws.append(row)
+
+
+def save_workbook(wb: Workbook, output: BinaryIO) -> None:
+    """Seperti Workbook.save, tapi dengan level deflate rendah (file langsung diupload)."""
+    with zipfile.ZipFile(
+        output, "w", zipfile.ZIP_DEFLATED, allowZip64=True, compresslevel=XLSX_COMPRESS_LEVEL
+    ) as archive:
+        ExcelWriter(wb, archive).save()
+
+
+def new_output() -> BinaryIO:
+    return tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_SIZE, mode="w+b")
+
+
+def upload_content(output: BinaryIO) -> bytes | BinaryIO:
+    """Isi untuk InputFile(..., read_file_handle=False): bytes jika masih di RAM, file handle jika sudah di disk."""
+    size = output.seek(0, os.SEEK_END)
+    output.seek(0)
+    if size > XLSX_SPOOL_MAX_SIZE:
+        # Spool sudah pindah ke disk: di-stream langsung dari file tanpa menyalin isinya ke RAM
+        return output
+    # Masih di RAM; file handle tidak dipakai karena httpx memanggil fileno(),
+    # yang akan memaksa spool ditulis ke disk
+    return output.read()